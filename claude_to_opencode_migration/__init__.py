@@ -0,0 +1,42 @@
+"""
+Claude Code → OpenCode migration.
+
+The implementation lives in migrate_claude_to_opencode.py so it can still be
+run directly with uv; this package re-exports it for tests and imports.
+"""
+
+from .migrate_claude_to_opencode import (
+    MigrationPlan,
+    build_permissions_from_settings,
+    ensure_color_hex,
+    extract_title_for_description,
+    main,
+    make_yaml_frontmatter,
+    map_model,
+    normalize_tool_name,
+    parse_bash_pattern,
+    parse_yaml_frontmatter,
+    run_migration,
+    tools_list_to_mapping,
+    transform_agent_markdown,
+    transform_command_markdown,
+    transform_mcp_servers,
+)
+
+__all__ = [
+    "MigrationPlan",
+    "build_permissions_from_settings",
+    "ensure_color_hex",
+    "extract_title_for_description",
+    "main",
+    "make_yaml_frontmatter",
+    "map_model",
+    "normalize_tool_name",
+    "parse_bash_pattern",
+    "parse_yaml_frontmatter",
+    "run_migration",
+    "tools_list_to_mapping",
+    "transform_agent_markdown",
+    "transform_command_markdown",
+    "transform_mcp_servers",
+]
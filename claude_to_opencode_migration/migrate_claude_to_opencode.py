@@ -2,6 +2,7 @@
 # /// script
 # requires-python = ">=3.10"
 # dependencies = [
+#   "orjson>=3.9.0",
 #   "PyYAML>=6.0.2",
 #   "rich>=13.7.0",
 # ]
@@ -17,23 +18,38 @@ Run:
 from __future__ import annotations
 
 import argparse
+import copy
 import datetime as _dt
 import difflib
+import functools
 import json
+import math
 import os
 import re
 import shutil
 import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 import yaml
-from rich.console import Console
+from rich.console import Console, Group, RenderableType
 from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
 
+try:
+    import orjson
+except ImportError:  # run outside uv without the optional speedup
+    orjson = None
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # PyYAML built without LibYAML bindings
+    from yaml import SafeLoader as _YamlLoader
+
 
 # ---------------------------
 # Constants and mappings
@@ -57,10 +73,40 @@ MODEL_MAP = {
     "haiku-4.5": "anthropic/claude-haiku-4-5",
 }
 
-UNSUPPORTED_TOOLS = {
+UNSUPPORTED_TOOLS = frozenset({
     "websearch",  # No OpenCode equivalent
     "task",       # Use @mention or subagent instead
-}
+})
+
+# Number of buffered messages MigrationPlan.execute() prints in one go
+OUTPUT_BATCH_SIZE = 50
+
+# Threads used to read agent/command sources concurrently
+READ_WORKERS = min(8, os.cpu_count() or 4)
+
+MCP_PAT = re.compile(r"^mcp__([A-Za-z0-9_\-]+)__([A-Za-z0-9_\-]+)$")
+_COLOR_HEX_RE = re.compile(r"#?[0-9a-f]{6}", re.IGNORECASE)
+# Whitespace is [^\S\n] so the multiline search never crosses a line
+_TITLE_RE = re.compile(r"^[^\S\n]*#[^\S\n]+(\S.*)$", re.MULTILINE)
+# Line boundaries str.splitlines() knows besides \n
+_OTHER_LINE_BREAK_RE = re.compile(r"[\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+_SLUG_RE = re.compile(r"[_\-]+")
+# A frontmatter line whose value is already valid JSON (quoted string, integer,
+# boolean, null or flow list). Blocks made only of these skip the YAML parser.
+_JSON_FM_LINE_RE = re.compile(r'^([A-Za-z_][\w-]*) *: +(".*"|\d+|true|false|null|\[.*\]) *$')
+# Keys YAML 1.1 resolves to bool/null rather than str, e.g. `yes: x` is {True: "x"}
+_YAML_BOOL_NULL_KEYS = frozenset({"yes", "no", "true", "false", "on", "off", "null"})
+# JSON joins escaped surrogate pairs into one character; YAML does not
+_SURROGATE_ESCAPE_RE = re.compile(r"\\u[dD][89a-fA-F]")
+# Characters outside YAML's printable set, which the YAML reader rejects outright, plus
+# tab, which LibYAML and the pure-Python loader disagree on inside flow lists
+_YAML_UNSAFE_CHARS_RE = re.compile("[^\x0A\x0D\x20-\x7E\x85\xA0-\uD7FF\uE000-\uFFFD\U00010000-\U0010FFFF]")
+
+# 19+ digit integers may be outside orjson's 64-bit range, which it reads as floats
+_LONG_INT_RE = re.compile(rb"\d{19,}")
+
+# Flattens an absolute path into a single backup file name
+_SAFE_ABS_TABLE = str.maketrans({":": None, "/": "_", "\\": "_"})
 
 
 # ---------------------------
@@ -73,27 +119,96 @@ def _now_ts() -> str:
 
 def read_text(path: Path) -> Optional[str]:
     try:
-        return path.read_text(encoding="utf-8")
+        text = path.read_bytes().decode("utf-8")
     except FileNotFoundError:
         return None
+    # Match text-mode reads: normalize CRLF/CR so frontmatter delimiters still match
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def write_temp_sibling(target: Path, content: str) -> Path:
+    """Write content next to target, carrying over target's mode if it exists."""
+    tmp = target.with_name(f".{target.name}.tmp")
+    try:
+        tmp.write_text(content, encoding="utf-8")
+        if target.exists():
+            shutil.copymode(target, tmp)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return tmp
 
 
 def write_text(path: Path, content: str) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
+    """Write content to path; the parent directory must already exist."""
+    # Replace instead of truncating in place: a backup may be a hard link to the old file
+    target = path.resolve()
+    tmp = write_temp_sibling(target, content)
+    try:
+        os.replace(tmp, target)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def clone_file(src: Path, dest: Path) -> None:
+    """Copy src to dest, hard-linking or copying in-kernel where the platform allows."""
+    try:
+        os.link(src, dest)
+        return
+    except OSError:
+        pass  # cross-device, unsupported filesystem, or dest already exists
+    if hasattr(os, "copy_file_range"):
+        try:
+            with src.open("rb") as fin, dest.open("wb") as fout:
+                remaining = os.fstat(fin.fileno()).st_size
+                while remaining > 0:
+                    n = os.copy_file_range(fin.fileno(), fout.fileno(), remaining)
+                    if n == 0:
+                        break
+                    remaining -= n
+            shutil.copystat(src, dest)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dest)
 
 
 def load_json(path: Path) -> Dict[str, Any]:
     try:
-        with path.open("r", encoding="utf-8") as f:
-            return json.load(f)
+        raw = path.read_bytes()
     except FileNotFoundError:
         return {}
+    if orjson is not None and not _LONG_INT_RE.search(raw):
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass  # json also accepts NaN/Infinity; let it have the final say
+    try:
+        return json.loads(raw.decode("utf-8"))
     except json.JSONDecodeError as e:
         raise RuntimeError(f"Invalid JSON at {path}: {e}")
 
 
+def _orjson_can_dump(value: Any) -> bool:
+    """False if orjson would reject or rewrite value: ints beyond 64 bits, NaN/inf."""
+    if isinstance(value, dict):
+        return all(_orjson_can_dump(k) and _orjson_can_dump(v) for k, v in value.items())
+    if isinstance(value, list):
+        return all(_orjson_can_dump(v) for v in value)
+    if isinstance(value, int):
+        return -(2**63) <= value < 2**64
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return True
+
+
 def dump_json(data: Dict[str, Any]) -> str:
+    if orjson is not None and _orjson_can_dump(data):
+        opts = orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(data, option=opts).decode("utf-8")
     return json.dumps(data, indent=2, ensure_ascii=False) + "\n"
 
 
@@ -104,18 +219,21 @@ def unified_diff(old: str, new: str, path: str) -> str:
     return "".join(diff)
 
 
-def ensure_color_hex(value: Optional[str], console: Console, ctx: str) -> Optional[str]:
+def ensure_color_hex(value: Optional[str], console: Optional[Console], ctx: str) -> Optional[str]:
     if not value:
         return None
-    v = value.strip().lower()
-    if v in COLOR_MAP:
-        return COLOR_MAP[v]
-    if re.fullmatch(r"#?[0-9a-f]{6}", v, flags=re.IGNORECASE):
+    v = value.strip().casefold()
+    hit = COLOR_MAP.get(v)
+    if hit:
+        return hit
+    if _COLOR_HEX_RE.fullmatch(v):
         return v if v.startswith("#") else f"#{v}"
-    console.print(f"[yellow]Warning:[/yellow] Unknown color '{value}' at {ctx}; keeping as-is")
+    if console:
+        console.print(f"[yellow]Warning:[/yellow] Unknown color '{value}' at {ctx}; keeping as-is")
     return value
 
 
+@functools.lru_cache(maxsize=512)
 def map_model(value: Optional[str]) -> Optional[str]:
     if not value:
         return None
@@ -126,21 +244,32 @@ def map_model(value: Optional[str]) -> Optional[str]:
     return MODEL_MAP.get(low, v)  # fallback to original if unmapped
 
 
-MCP_PAT = re.compile(r"^mcp__([A-Za-z0-9_\-]+)__([A-Za-z0-9_\-]+)$")
+# Unsupported tools already reported, so each is warned about once per process
+_warned_unsupported_tools: Set[str] = set()
+
 
 def normalize_tool_name(token: str, *, console: Optional[Console] = None) -> Optional[str]:
+    name = _normalize_tool_name_cached(token)
+    if name is None and console and token not in _warned_unsupported_tools:
+        _warned_unsupported_tools.add(token)
+        console.print(f"[yellow]Warning:[/yellow] Dropping unsupported tool '{token}'")
+    return name
+
+
+@functools.lru_cache(maxsize=512)
+def _normalize_tool_name_cached(token: str) -> Optional[str]:
     token_lower = token.lower()
 
     # Drop unsupported
     if token_lower in UNSUPPORTED_TOOLS:
-        if console:
-            console.print(f"[yellow]Warning:[/yellow] Dropping unsupported tool '{token}'")
         return None
 
-    m = MCP_PAT.match(token)
-    if m:
-        server, tool = m.group(1), m.group(2)
-        return f"{server.lower()}_{tool.lower()}"
+    # Cheap prefix test first; the regex only runs on MCP-looking tokens. The
+    # prefix is case-sensitive, so matching on token_lower is equivalent.
+    if token.startswith("mcp__"):
+        m = MCP_PAT.match(token_lower)
+        if m:
+            return f"{m.group(1)}_{m.group(2)}"
 
     # PascalCase or other → lowercase
     return token_lower
@@ -148,34 +277,80 @@ def normalize_tool_name(token: str, *, console: Optional[Console] = None) -> Opt
 
 def tools_list_to_mapping(tools_list: Iterable[str], console: Console) -> Dict[str, bool]:
     out: Dict[str, bool] = {"*": False}
-    for raw in tools_list:
-        t = normalize_tool_name(raw.strip(), console=console)
-        if not t:
+    out.update({t: True for raw in tools_list if (t := normalize_tool_name(raw.strip(), console=console))})
+    return out
+
+
+def _load_json_frontmatter(fm_str: str) -> Optional[Dict[str, Any]]:
+    """Parse a flat, JSON-shaped frontmatter block; None if YAML is needed."""
+    if _YAML_UNSAFE_CHARS_RE.search(fm_str):
+        return None
+    out: Dict[str, Any] = {}
+    for line in fm_str.splitlines():
+        if not line.strip(" "):  # YAML only treats space-only lines as blank
             continue
-        out[t] = True
+        m = _JSON_FM_LINE_RE.match(line)
+        if not m:
+            return None
+        key, raw = m.groups()
+        if key.lower() in _YAML_BOOL_NULL_KEYS or _SURROGATE_ESCAPE_RE.search(raw):
+            return None
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return None
+        # Only lists of strings read the same; YAML 1.1 differs on e.g. 1e3
+        if isinstance(value, list) and not all(isinstance(item, str) for item in value):
+            return None
+        out[key] = value
     return out
 
 
 def parse_yaml_frontmatter(md: str) -> Tuple[Optional[Dict[str, Any]], str]:
     """Return (frontmatter_dict_or_None, body)"""
+    fm, body = _parse_frontmatter_cached(md)
+    # Deep copy: nested lists/dicts would otherwise be shared with the cached result
+    return copy.deepcopy(fm), body
+
+
+# Keyed on the file text itself, so unchanged files are parsed once per process
+# even across run_migration() calls.
+@functools.lru_cache(maxsize=1024)
+def _parse_frontmatter_cached(md: str) -> Tuple[Optional[Dict[str, Any]], str]:
     if not md.startswith("---"):
         return None, md
-    lines = md.splitlines()
-    if not lines or lines[0].strip() != "---":
+    size = len(md)
+    open_end = md.find("\n")
+    if open_end < 0:
+        open_end = size
+    if md[:open_end].strip() != "---":
         return None, md
     # find closing '---' on a line by itself
-    end_idx = None
-    for i in range(1, min(len(lines), 2000)):  # safety bound
-        if lines[i].strip() == "---":
-            end_idx = i
+    close = None
+    pos = open_end + 1
+    while pos < size:
+        idx = md.find("---", pos)
+        if idx < 0:
             break
-    if end_idx is None:
+        line_start = md.rfind("\n", 0, idx) + 1
+        line_end = md.find("\n", idx + 3)
+        if line_end < 0:
+            line_end = size
+        if md[line_start:line_end].strip() == "---":
+            if md.count("\n", 0, line_start) < 2000:  # safety bound
+                close = (line_start, line_end)
+            break
+        pos = line_end + 1
+    if close is None:
         return None, md
 
-    fm_str = "\n".join(lines[1:end_idx]) + "\n"
-    body = "\n".join(lines[end_idx + 1:]) + ("\n" if md.endswith("\n") else "")
+    fm_str = md[open_end + 1:close[0]]
+    body = md[close[1] + 1:] or ("\n" if md.endswith("\n") else "")
+    fm = _load_json_frontmatter(fm_str)
+    if fm is not None:
+        return fm, body
     try:
-        fm = yaml.safe_load(fm_str) or {}
+        fm = yaml.load(fm_str, Loader=_YamlLoader) or {}
         if not isinstance(fm, dict):
             fm = {}
     except Exception:
@@ -183,19 +358,30 @@ def parse_yaml_frontmatter(md: str) -> Tuple[Optional[Dict[str, Any]], str]:
     return fm, body
 
 
+# Emitter settings for generated frontmatter, built once for every file written.
+# Same output as yaml.safe_dump; CSafeDumper would escape emoji as \U0001F680.
+_YAML_DUMP_KW: Dict[str, Any] = {
+    "Dumper": yaml.SafeDumper,
+    "sort_keys": False,
+    "default_flow_style": False,
+    "allow_unicode": True,
+}
+
+
 def make_yaml_frontmatter(data: Dict[str, Any]) -> str:
-    dumped = yaml.safe_dump(data, sort_keys=False, allow_unicode=True)
-    return f"---\n{dumped}---\n"
+    return f"---\n{yaml.dump(data, **_YAML_DUMP_KW)}---\n"
 
 
 def extract_title_for_description(md_body: str, fallback_name: str) -> str:
-    for line in md_body.splitlines():
-        m = re.match(r"^\s*#\s+(.+)$", line.strip())
+    # Rare bodies with other line breaks are split first so headings still start a line
+    chunks = md_body.splitlines() if _OTHER_LINE_BREAK_RE.search(md_body) else (md_body,)
+    for chunk in chunks:
+        m = _TITLE_RE.search(chunk)
         if m:
             return m.group(1).strip()
     # fallback from filename
     name = Path(fallback_name).stem
-    name = re.sub(r"[_\-]+", " ", name).strip().title()
+    name = _SLUG_RE.sub(" ", name).strip().title()
     return name or "Command"
 
 
@@ -216,7 +402,7 @@ def parse_bash_pattern(item: str) -> Optional[str]:
 # Migration Plan Engine
 # ---------------------------
 
-@dataclass
+@dataclass(slots=True)
 class Action:
     kind: str  # "mkdir", "write_text", "update_json"
     path: Path
@@ -231,8 +417,20 @@ class MigrationPlan:
     dry_run: bool
     conflict: str  # "skip" | "overwrite" | "prompt"
     console: Console
-    actions: List[Action] = field(default_factory=list)
+    verbose: bool = False  # show full unified diffs in dry-run
+    # Actions are kept per kind and executed kind by kind: mkdirs, writes, JSON updates
+    mkdirs: List[Action] = field(default_factory=list)
+    writes: List[Action] = field(default_factory=list)
+    json_updates: Dict[Path, Action] = field(default_factory=dict)
+    _queued_dirs: Set[Path] = field(default_factory=set)
     _backup_dir: Optional[Path] = None
+    _root_resolved: Path = field(init=False)
+    _resolved: Dict[Path, Path] = field(default_factory=dict)
+    # Per-action messages, printed in batches by _flush_output()
+    _output: List[RenderableType] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self._root_resolved = self.root.resolve()
 
     def backup_dir(self) -> Path:
         if self._backup_dir is None:
@@ -240,159 +438,255 @@ class MigrationPlan:
             self._backup_dir = self.root / f".opencode-migrate-backup/{ts}"
         return self._backup_dir
 
+    def _compare_on_disk(self, path: Path, new: str) -> Tuple[bool, bool, Optional[bytes]]:
+        """Return (exists, same_content, current_bytes); the file is only read when the sizes match."""
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return False, False, None
+        data = new.encode("utf-8")
+        if size != len(data):
+            return True, False, None
+        current = path.read_bytes()
+        return True, current == data, current
+
+    @property
+    def actions(self) -> List[Action]:
+        """All planned actions in execution order."""
+        return [*self.mkdirs, *self.writes, *self.json_updates.values()]
+
     def add_mkdir(self, path: Path, description: str = "Create directory") -> None:
-        self.actions.append(Action(kind="mkdir", path=path, description=description))
+        if path in self._queued_dirs:
+            return
+        self._queued_dirs.add(path)
+        self.mkdirs.append(Action(kind="mkdir", path=path, description=description))
 
     def add_write_text(self, path: Path, content: str, description: str) -> None:
-        self.actions.append(Action(kind="write_text", path=path, description=description, content=content))
+        self.writes.append(Action(kind="write_text", path=path, description=description, content=content))
 
     def add_update_json(self, path: Path, update_fn: Callable[[Dict[str, Any]], Dict[str, Any]], description: str) -> None:
-        self.actions.append(Action(kind="update_json", path=path, description=description, update_fn=update_fn))
-
-    def _backup_if_exists(self, path: Path) -> None:
-        if not path.exists():
+        prev = self.json_updates.get(path)
+        if prev is None:
+            self.json_updates[path] = Action(kind="update_json", path=path, description=description, update_fn=update_fn)
             return
+        # Fuse with the earlier update so the file is read, diffed and written once
+        first = prev.update_fn
+        prev.update_fn = lambda d: update_fn(first(d))
+        prev.description = f"{prev.description}; {description}"
+
+    def _resolve(self, path: Path) -> Path:
+        resolved = self._resolved.get(path)
+        if resolved is None:
+            resolved = self._resolved[path] = path.resolve()
+        return resolved
+
+    def _backup_dest(self, path: Path) -> Path:
         backup_root = self.backup_dir()
+        resolved = self._resolve(path)
         try:
-            rel = path.resolve().relative_to(self.root.resolve())
-            dest = backup_root / rel
+            rel = resolved.relative_to(self._root_resolved)
+            return backup_root / rel
         except Exception:
-            safe_abs = str(path.resolve()).replace(":", "").replace("/", "_")
-            dest = backup_root / "external" / safe_abs
-        dest.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(path, dest)
+            safe_abs = str(resolved).translate(_SAFE_ABS_TABLE)
+            return backup_root / "external" / safe_abs
+
+    def _replace_with_backup(self, path: Path, content: str) -> None:
+        """Overwrite an existing file, keeping the previous version in the backup dir."""
+        target = self._resolve(path)
+        dest = self._backup_dest(path)
+        tmp = write_temp_sibling(target, content)
+        try:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            # Back up via a link or copy first: target stays in place until the atomic replace
+            clone_file(target, dest)
+            os.replace(tmp, target)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    def _emit(self, renderable: RenderableType) -> None:
+        self._output.append(renderable)
+
+    def _flush_output(self) -> None:
+        if self._output:
+            self.console.print(Group(*self._output))
+            self._output.clear()
+
+    def _emit_dry_run_update(self, path: Path, old: str, new: str, label: str) -> None:
+        # Full diffs only with --verbose; difflib is the slowest part of a dry run
+        if self.verbose:
+            diff = unified_diff(old, new, str(path))
+            self._emit(Panel(diff or "(no diff?)", title=f"{label}: {path}", border_style="yellow"))
+            return
+        # Multiset line counts: cheap, and exact except that moved lines are not counted
+        old_lines = Counter(old.splitlines(keepends=True))
+        new_lines = Counter(new.splitlines(keepends=True))
+        added = sum((new_lines - old_lines).values())
+        removed = sum((old_lines - new_lines).values())
+        self._emit(f"[yellow]would update[/yellow] {path} (+{added} -{removed} lines)")
+
+    def _emit_dry_run_create(self, path: Path, new: str) -> None:
+        if self.verbose:
+            self._emit(f"[cyan]create[/cyan] {path}")
+            diff = unified_diff("", new, str(path))
+            self._emit(Panel(diff or new, title=f"new: {path}", border_style="green"))
+            return
+        size = len(new.encode("utf-8"))
+        self._emit(f"[cyan]would create[/cyan] {path} ({size} bytes)")
 
     def _maybe_prompt_overwrite(self, path: Path) -> bool:
         if self.conflict == "overwrite":
             return True
         if self.conflict == "skip":
             return False
+        self._flush_output()
         self.console.print(f"[yellow]File exists:[/yellow] {path}")
         resp = input("Overwrite? [y/N]: ").strip().lower()
         return resp in {"y", "yes"}
 
-    def execute(self) -> int:
-        created = 0
-        updated = 0
-        skipped = 0
-        errored = 0
+    def _allow_overwrite(self, path: Path) -> bool:
+        """Apply the conflict strategy to an existing file, reporting skips."""
+        if self.conflict == "skip":
+            self._emit(f"[yellow]skip (conflict)[/yellow] {path}")
+            return False
+        if self.conflict == "prompt" and not self._maybe_prompt_overwrite(path):
+            self._emit(f"[yellow]skip[/yellow] {path}")
+            return False
+        return True
+
+    def _do_mkdir(self, act: Action) -> Optional[str]:
+        if self.dry_run:
+            exists = act.path.exists()
+            self._emit(f"[cyan]mkdir[/cyan] {act.path} {'(exists)' if exists else ''}")
+        else:
+            act.path.mkdir(parents=True, exist_ok=True)
+            self._emit(f"[green]mkdir[/green] {act.path}")
+        return None
 
-        for act in self.actions:
+    def _do_write_text(self, act: Action) -> Optional[str]:
+        new = act.content or ""
+        # Same byte-level check in dry and real runs, so a dry run predicts the real one
+        exists, same, current_bytes = self._compare_on_disk(act.path, new)
+        if same:
+            self._emit(f"[blue]up-to-date[/blue] {act.path}")
+            return "skipped"
+
+        if exists:
+            if self.dry_run:
+                # Decoded without newline translation so line-ending changes show in the diff
+                if current_bytes is None:  # sizes differed, so nothing was read yet
+                    current_bytes = act.path.read_bytes()
+                current = current_bytes.decode("utf-8")
+                self._emit_dry_run_update(act.path, current, new, "diff")
+                return "skipped"
+            if not self._allow_overwrite(act.path):
+                return "skipped"
+            self._replace_with_backup(act.path, new)
+            self._emit(f"[green]updated[/green] {act.path}")
+            return "updated"
+
+        if self.dry_run:
+            self._emit_dry_run_create(act.path, new)
+            return "created"
+        write_text(act.path, new)
+        self._emit(f"[green]created[/green] {act.path}")
+        return "created"
+
+    def _do_update_json(self, act: Action) -> Optional[str]:
+        current_obj = load_json(act.path)
+        if not isinstance(current_obj, dict):
+            current_obj = {}
+        new_obj = act.update_fn(current_obj)
+        new_json = dump_json(new_obj)
+        current_json = dump_json(current_obj)
+
+        if current_json == new_json:
+            self._emit(f"[blue]up-to-date[/blue] {act.path}")
+            return "skipped"
+
+        exists = act.path.exists()
+        if self.dry_run:
+            if not exists:
+                self._emit_dry_run_create(act.path, new_json)
+                return "created"
+            self._emit_dry_run_update(act.path, current_json, new_json, "json diff")
+            return "skipped"
+
+        if exists:
+            if not self._allow_overwrite(act.path):
+                return "skipped"
+            self._replace_with_backup(act.path, new_json)
+            self._emit(f"[green]updated[/green] {act.path}")
+            return "updated"
+
+        write_text(act.path, new_json)
+        self._emit(f"[green]created[/green] {act.path}")
+        return "created"
+
+    def _ensure_parent_dirs(self) -> None:
+        """Create each distinct parent of the files to be written, once."""
+        parents = {act.path.parent for act in self.writes}
+        parents.update(path.parent for path in self.json_updates)
+        for d in parents - self._queued_dirs:
             try:
-                if act.kind == "mkdir":
-                    if self.dry_run:
-                        exists = act.path.exists()
-                        self.console.print(f"[cyan]mkdir[/cyan] {act.path} {'(exists)' if exists else ''}")
-                    else:
-                        act.path.mkdir(parents=True, exist_ok=True)
-                        self.console.print(f"[green]mkdir[/green] {act.path}")
-                    continue
-
-                if act.kind == "write_text":
-                    current = read_text(act.path)
-                    new = act.content or ""
-                    if current == new:
-                        skipped += 1
-                        self.console.print(f"[blue]up-to-date[/blue] {act.path}")
-                        continue
+                d.mkdir(parents=True, exist_ok=True)
+            except OSError:
+                pass  # surfaces as an error on the write itself
 
-                    if act.path.exists():
-                        if self.dry_run:
-                            diff = unified_diff(current or "", new, str(act.path))
-                            self.console.print(Panel(diff or "(no diff?)", title=f"diff: {act.path}", border_style="yellow"))
-                            skipped += 1
-                            continue
-                        else:
-                            if self.conflict == "skip":
-                                skipped += 1
-                                self.console.print(f"[yellow]skip (conflict)[/yellow] {act.path}")
-                                continue
-                            if self.conflict == "prompt":
-                                if not self._maybe_prompt_overwrite(act.path):
-                                    skipped += 1
-                                    self.console.print(f"[yellow]skip[/yellow] {act.path}")
-                                    continue
-                            self._backup_if_exists(act.path)
-                            write_text(act.path, new)
-                            updated += 1
-                            self.console.print(f"[green]updated[/green] {act.path}")
-                    else:
-                        if self.dry_run:
-                            self.console.print(f"[cyan]create[/cyan] {act.path}")
-                            diff = unified_diff("", new, str(act.path))
-                            self.console.print(Panel(diff or new, title=f"new: {act.path}", border_style="green"))
-                            created += 1
-                        else:
-                            write_text(act.path, new)
-                            created += 1
-                            self.console.print(f"[green]created[/green] {act.path}")
-                    continue
-
-                if act.kind == "update_json":
-                    current_obj = load_json(act.path)
-                    new_obj = act.update_fn(current_obj if isinstance(current_obj, dict) else {})
-                    new_json = dump_json(new_obj)
-                    current_json = dump_json(current_obj if isinstance(current_obj, dict) else {})
-
-                    if current_json == new_json:
-                        skipped += 1
-                        self.console.print(f"[blue]up-to-date[/blue] {act.path}")
-                        continue
+    def execute(self) -> int:
+        counts = {"created": 0, "updated": 0, "skipped": 0, "errored": 0}
 
-                    if self.dry_run:
-                        diff = unified_diff(current_json, new_json, str(act.path))
-                        self.console.print(Panel(diff or "(no diff?)", title=f"json diff: {act.path}", border_style="yellow"))
-                        skipped += 1
-                    else:
-                        if act.path.exists():
-                            if self.conflict == "skip":
-                                skipped += 1
-                                self.console.print(f"[yellow]skip (conflict)[/yellow] {act.path}")
-                                continue
-                            if self.conflict == "prompt":
-                                if not self._maybe_prompt_overwrite(act.path):
-                                    skipped += 1
-                                    self.console.print(f"[yellow]skip[/yellow] {act.path}")
-                                    continue
-                            self._backup_if_exists(act.path)
-                            self.console.print(f"[green]updated[/green] {act.path}")
-                            act.path.parent.mkdir(parents=True, exist_ok=True)
-                            act.path.write_text(new_json, encoding="utf-8")
-                            updated += 1
-                        else:
-                            self.console.print(f"[green]created[/green] {act.path}")
-                            act.path.parent.mkdir(parents=True, exist_ok=True)
-                            act.path.write_text(new_json, encoding="utf-8")
-                            created += 1
-                    continue
-
-                self.console.print(f"[red]Unknown action kind[/red]: {act.kind}")
-                errored += 1
+        def run(act: Action, handler: Callable[[Action], Optional[str]]) -> None:
+            if len(self._output) >= OUTPUT_BATCH_SIZE:
+                self._flush_output()
+            try:
+                outcome = handler(act)
             except Exception as e:
-                errored += 1
-                self.console.print(f"[red]error[/red] {act.path}: {e}")
+                outcome = "errored"
+                self._emit(f"[red]error[/red] {act.path}: {e}")
+            if outcome:
+                counts[outcome] += 1
+
+        for act in self.mkdirs:
+            run(act, self._do_mkdir)
+        if not self.dry_run:
+            self._ensure_parent_dirs()
+        for act in self.writes:
+            run(act, self._do_write_text)
+        for act in self.json_updates.values():
+            run(act, self._do_update_json)
 
         summary = Table(title="Migration Summary", show_header=False)
-        summary.add_row("Created", str(created))
-        summary.add_row("Updated", str(updated))
-        summary.add_row("Skipped", str(skipped))
-        summary.add_row("Errored", str(errored))
-        if not self.dry_run and (created or updated):
-            self.console.print(f"Backups stored under: {self.backup_dir()}")
-        self.console.print(summary)
-        return 0 if errored == 0 else 1
+        summary.add_row("Created", str(counts["created"]))
+        summary.add_row("Updated", str(counts["updated"]))
+        summary.add_row("Skipped", str(counts["skipped"]))
+        summary.add_row("Errored", str(counts["errored"]))
+        if not self.dry_run and (counts["created"] or counts["updated"]):
+            self._emit(f"Backups stored under: {self.backup_dir()}")
+        self._emit(summary)
+        self._flush_output()
+        return 0 if counts["errored"] == 0 else 1
 
 
 # ---------------------------
 # Discovery and transforms
 # ---------------------------
 
+def _scan_markdown_files(directory: Path) -> List[Path]:
+    try:
+        it = os.scandir(directory)
+    except OSError:  # missing, not a directory, or unreadable: nothing to migrate
+        return []
+    with it:
+        return sorted(Path(e.path) for e in it if e.name.endswith(".md") and e.is_file())
+
+
 def discover_agent_files(root: Path) -> List[Path]:
-    return sorted((root / ".claude" / "agents").glob("*.md"))
+    return _scan_markdown_files(root / ".claude" / "agents")
 
 
 def discover_command_files(root: Path) -> List[Path]:
-    return sorted((root / ".claude" / "commands").glob("*.md"))
+    return _scan_markdown_files(root / ".claude" / "commands")
 
 
 def discover_settings(root: Path, include_local: bool) -> Dict[str, Any]:
@@ -407,9 +701,7 @@ def discover_settings(root: Path, include_local: bool) -> Dict[str, Any]:
             mp = local["permissions"]
             bp = merged.setdefault("permissions", {})
             for k in ("allow", "deny"):
-                ba = set(bp.get(k, []))
-                la = set(mp.get(k, []))
-                bp[k] = sorted(ba.union(la))
+                bp[k] = sorted({*bp.get(k, ()), *mp.get(k, ())})
     return merged
 
 
@@ -548,39 +840,31 @@ def update_opencode_json_factory(
     add_tools: Dict[str, bool],
     add_mcp: Dict[str, Any],
 ) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    add_bash = add_permission.get("bash", {})
+    add_perm_rest = {k: v for k, v in add_permission.items() if k != "bash"}
+
     def updater(current: Dict[str, Any]) -> Dict[str, Any]:
-        new = dict(current) if current else {}
-        perm = dict(new.get("permission", {}))
-        tools = dict(new.get("tools", {}))
-        mcp = dict(new.get("mcp", {}))
+        # Never mutate `current`: the plan may hold it as its cached on-disk state
+        current = current or {}
+        cur_perm = current.get("permission") or {}
+        cur_tools = current.get("tools") or {}
 
         # Merge bash permissions
-        bash_cur = dict(perm.get("bash", {}))
-        bash_add = dict(add_permission.get("bash", {}))
-        for k, v in bash_add.items():
-            if k not in bash_cur:
-                bash_cur[k] = v
-        perm["bash"] = {"*": "ask", **bash_cur} if "*" not in bash_cur else bash_cur
-
-        for k, v in add_permission.items():
-            if k == "bash":
-                continue
-            if k not in perm:
-                perm[k] = v
+        bash_cur = cur_perm.get("bash") or {}
+        bash = bash_cur | {k: v for k, v in add_bash.items() if k not in bash_cur}
+        if "*" not in bash:
+            bash = {"*": "ask"} | bash
 
-        tools.setdefault("*", False)
-        for k, v in add_tools.items():
-            tools.setdefault(k, v)
+        perm = cur_perm | {"bash": bash}
+        perm |= {k: v for k, v in add_perm_rest.items() if k not in perm}
 
-        for name, cfg in add_mcp.items():
-            if name not in mcp:
-                mcp[name] = cfg
+        tools = cur_tools if "*" in cur_tools else cur_tools | {"*": False}
+        tools = tools | {k: v for k, v in add_tools.items() if k not in tools}
 
-        new["permission"] = perm
-        new["tools"] = tools
+        new = current | {"permission": perm, "tools": tools}
         if add_mcp:
-            new["mcp"] = mcp
-
+            cur_mcp = current.get("mcp") or {}
+            new["mcp"] = cur_mcp | {n: c for n, c in add_mcp.items() if n not in cur_mcp}
         return new
     return updater
 
@@ -644,39 +928,48 @@ def run_migration(
     dry_run: bool,
     conflict: str,
     console: Console,
+    verbose: bool = False,
 ) -> int:
-    plan = MigrationPlan(root=root, dry_run=dry_run, conflict=conflict, console=console)
+    plan = MigrationPlan(root=root, dry_run=dry_run, conflict=conflict, console=console, verbose=verbose)
 
     op_agent_dir = root / ".opencode" / "agent"
     op_command_dir = root / ".opencode" / "command"
     op_project_config = root / "opencode.json"
     op_global_config = Path(os.path.expanduser("~")) / ".config" / "opencode" / "opencode.json"
 
-    if migrate_agents:
-        plan.add_mkdir(op_agent_dir, "Ensure .opencode/agent directory")
-        for src in discover_agent_files(root):
-            try:
-                md = read_text(src)
-                if md is None:
-                    continue
-                new_md = transform_agent_markdown(md, src.name, console)
-                dest = op_agent_dir / src.name
-                plan.add_write_text(dest, new_md, f"Migrate agent {src.name}")
-            except Exception as e:
-                console.print(f"[red]Agent error[/red] {src}: {e}")
+    agent_files = discover_agent_files(root) if migrate_agents else []
+    command_files = discover_command_files(root) if migrate_commands else []
 
-    if migrate_commands:
-        plan.add_mkdir(op_command_dir, "Ensure .opencode/command directory")
-        for src in discover_command_files(root):
-            try:
-                md = read_text(src)
-                if md is None:
-                    continue
-                new_md = transform_command_markdown(md, src.name, console)
-                dest = op_command_dir / src.name
-                plan.add_write_text(dest, new_md, f"Migrate command {src.name}")
-            except Exception as e:
-                console.print(f"[red]Command error[/red] {src}: {e}")
+    # Overlap source reads; transforms stay sequential so warnings print in file order
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+        agent_reads = [(src, pool.submit(read_text, src)) for src in agent_files]
+        command_reads = [(src, pool.submit(read_text, src)) for src in command_files]
+
+        if migrate_agents:
+            plan.add_mkdir(op_agent_dir, "Ensure .opencode/agent directory")
+            for src, pending in agent_reads:
+                try:
+                    md = pending.result()
+                    if md is None:
+                        continue
+                    new_md = transform_agent_markdown(md, src.name, console)
+                    dest = op_agent_dir / src.name
+                    plan.add_write_text(dest, new_md, f"Migrate agent {src.name}")
+                except Exception as e:
+                    console.print(f"[red]Agent error[/red] {src}: {e}")
+
+        if migrate_commands:
+            plan.add_mkdir(op_command_dir, "Ensure .opencode/command directory")
+            for src, pending in command_reads:
+                try:
+                    md = pending.result()
+                    if md is None:
+                        continue
+                    new_md = transform_command_markdown(md, src.name, console)
+                    dest = op_command_dir / src.name
+                    plan.add_write_text(dest, new_md, f"Migrate command {src.name}")
+                except Exception as e:
+                    console.print(f"[red]Command error[/red] {src}: {e}")
 
     add_permission: Dict[str, Any] = {}
     add_tools: Dict[str, bool] = {}
@@ -726,10 +1019,10 @@ def build_parser() -> argparse.ArgumentParser:
     p.add_argument("--include-local", action="store_true", help="Include .claude/settings.local.json")
     p.add_argument("--mcp-target", choices=["project", "global"], default="project", help="Where to write MCP config")
 
-    p.add_argument("--dry-run", action="store_true", help="Show diffs without writing")
+    p.add_argument("--dry-run", action="store_true", help="Show planned changes without writing")
     p.add_argument("--conflict", choices=["skip", "overwrite", "prompt"], default="skip", help="Conflict handling")
     p.add_argument("--no-color", action="store_true", help="Disable colored output")
-    p.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    p.add_argument("-v", "--verbose", action="store_true", help="Show full diffs in dry-run")
 
     return p
 
@@ -768,6 +1061,7 @@ def main(argv: Optional[List[str]] = None) -> int:
         dry_run=args.dry_run,
         conflict=args.conflict,
         console=console,
+        verbose=args.verbose,
     )
 
 
@@ -3,6 +3,7 @@
 # requires-python = ">=3.10"
 # dependencies = [
 #   "pytest>=8.0.0",
+#   "orjson>=3.9.0",
 #   "PyYAML>=6.0.2",
 #   "rich>=13.7.0",
 # ]
@@ -15,7 +16,9 @@ Run with: uv run pytest claude_to_opencode_migration/tests/test_migration.py -v
 
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import shutil
 import tempfile
 from pathlib import Path
@@ -24,10 +27,12 @@ from typing import Any, Dict
 import pytest
 from rich.console import Console
 
-# Import from sibling module
-import sys
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from migrate_claude_to_opencode import (
+if __name__ == "__main__" and not __package__:
+    # Run as a script (uv run .../test_migration.py): make the package importable
+    import sys
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from claude_to_opencode_migration import (
     normalize_tool_name,
     tools_list_to_mapping,
     map_model,
@@ -40,6 +45,7 @@ from migrate_claude_to_opencode import (
     transform_command_markdown,
     build_permissions_from_settings,
     transform_mcp_servers,
+    MigrationPlan,
     run_migration,
 )
 
@@ -48,22 +54,43 @@ from migrate_claude_to_opencode import (
 # Fixtures
 # ---------------------------
 
+class _NullConsole:
+    """Stand-in for rich's Console where output is only passed through for warnings."""
+
+    def print(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+
+@pytest.fixture(scope="session")
+def console() -> _NullConsole:
+    """A console that discards output, for unit tests of the transforms."""
+    return _NullConsole()
+
+
 @pytest.fixture
-def console() -> Console:
-    """A console that captures output."""
+def rich_console() -> Console:
+    """A real console, for tests that exercise MigrationPlan output rendering."""
     return Console(force_terminal=False, no_color=True)
 
 
-@pytest.fixture
-def temp_project(tmp_path: Path) -> Path:
-    """Create a temporary project with Claude config."""
+def _link_or_copy(src: str, dst: str) -> None:
+    """Hard-link fixture files; the migration never rewrites files in place."""
+    try:
+        os.link(src, dst)
+    except OSError:  # cross-device or no hard-link support
+        shutil.copy2(src, dst)
+
+
+@pytest.fixture(scope="session")
+def template_project(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Build the sample Claude project once per session; tests get linked copies."""
+    project = tmp_path_factory.mktemp("template") / "project"
     fixtures = Path(__file__).parent / "fixtures" / "claude_sample"
     if fixtures.exists():
-        shutil.copytree(fixtures, tmp_path / "project")
-        return tmp_path / "project"
+        shutil.copytree(fixtures, project)
+        return project
 
     # Fallback: create minimal structure
-    project = tmp_path / "project"
     claude_dir = project / ".claude"
     (claude_dir / "agents").mkdir(parents=True)
     (claude_dir / "commands").mkdir(parents=True)
@@ -97,6 +124,14 @@ Do the thing.
     return project
 
 
+@pytest.fixture
+def temp_project(template_project: Path, tmp_path: Path) -> Path:
+    """Create a temporary project with Claude config."""
+    project = tmp_path / "project"
+    shutil.copytree(template_project, project, copy_function=_link_or_copy)
+    return project
+
+
 # ---------------------------
 # Unit Tests: normalize_tool_name
 # ---------------------------
@@ -209,6 +244,10 @@ class TestEnsureColorHex:
         result = ensure_color_hex("purple", console, "test")
         assert result == "purple"  # Kept as-is with warning
 
+    def test_without_console(self):
+        assert ensure_color_hex("Blue", None, "test") == "#3B82F6"
+        assert ensure_color_hex("purple", None, "test") == "purple"
+
 
 # ---------------------------
 # Unit Tests: parse_bash_pattern
@@ -265,6 +304,68 @@ Body only.
         assert fm == {}
         assert "Body only." in body
 
+    def test_result_does_not_share_state_with_cache(self):
+        md = "---\ntools: [Read]\npermission:\n  edit: allow\n---\nBody\n"
+        fm, _ = parse_yaml_frontmatter(md)
+        fm["tools"].append("Write")
+        fm["permission"]["edit"] = "deny"
+        fm["extra"] = True
+
+        again, _ = parse_yaml_frontmatter(md)
+        assert again == {"tools": ["Read"], "permission": {"edit": "allow"}}
+
+    def test_json_shaped_frontmatter(self):
+        md = """---
+description: "Quoted: with colon"
+count: 3
+enabled: true
+tags: ["a", "b"]
+---
+
+Body.
+"""
+        fm, body = parse_yaml_frontmatter(md)
+        assert fm == {
+            "description": "Quoted: with colon",
+            "count": 3,
+            "enabled": True,
+            "tags": ["a", "b"],
+        }
+        assert "Body." in body
+
+    def test_non_json_values_fall_back_to_yaml(self):
+        md = """---
+description: "Quoted"
+tags: [a, b]
+mode: 0755
+---
+"""
+        fm, _ = parse_yaml_frontmatter(md)
+        assert fm == {"description": "Quoted", "tags": ["a", "b"], "mode": 493}
+
+        # JSON-valid lines that YAML 1.1 reads differently must not take the fast path
+        for line, expected in [
+            ('yes: "x"', {True: "x"}),
+            ('off: "x"', {False: "x"}),
+            ('null: "x"', {None: "x"}),
+            ("k: [1e3]", {"k": ["1e3"]}),
+            ('k: ["a", 1]', {"k": ["a", 1]}),
+            ('k:"x"', {}),
+            # Only space-only lines are blank to YAML; other whitespace is an error
+            ('\t\na: ["x"]', {}),
+            ('\xa0\na: "x"', {}),
+            ('\u3000\na: "x"', {}),
+            ('\x0b\na: "x"', {}),
+            ('\x1c\na: "x"', {}),
+            ('  \na: "x"', {"a": "x"}),
+            # Raw non-printables are rejected by the YAML reader
+            ('a: "x\x7fy"', {}),
+            ('a: "x\x9fy"', {}),
+            ('a: "\ufffe"', {}),
+        ]:
+            fm, _ = parse_yaml_frontmatter(f"---\n{line}\n---\n")
+            assert repr(fm) == repr(expected), line
+
 
 # ---------------------------
 # Unit Tests: extract_title_for_description
@@ -284,6 +385,13 @@ class TestExtractTitleForDescription:
         md = "# First\n\n# Second"
         assert extract_title_for_description(md, "fallback.md") == "First"
 
+    def test_unicode_whitespace_and_line_breaks(self):
+        assert extract_title_for_description("#\u3000見出し", "fallback.md") == "見出し"
+        assert extract_title_for_description("#\xa0Title", "fallback.md") == "Title"
+        assert extract_title_for_description("intro\x0c# Title", "fallback.md") == "Title"
+        assert extract_title_for_description("# Title\u2028more", "fallback.md") == "Title"
+        assert extract_title_for_description("#\x0cTitle", "fallback.md") == "Fallback"
+
 
 # ---------------------------
 # Unit Tests: transform_agent_markdown
@@ -327,6 +435,17 @@ Content.
         assert "description: Minimal agent" in result
         assert "'*': false" in result
 
+    def test_non_ascii_description_is_written_literally(self, console):
+        md = """---
+description: Deploys the app 🚀 — café 日本
+---
+
+Content.
+"""
+        result = transform_agent_markdown(md, "deploy.md", console)
+        assert "description: Deploys the app 🚀 — café 日本\n" in result
+        assert make_yaml_frontmatter({"a": "é 🚀"}) == "---\na: é 🚀\n---\n"
+
 
 # ---------------------------
 # Unit Tests: transform_command_markdown
@@ -445,12 +564,159 @@ class TestTransformMcpServers:
         assert result["tool"]["command"] == ["python", "-m", "mcp"]
 
 
+# ---------------------------
+# Unit Tests: MigrationPlan
+# ---------------------------
+
+class TestMigrationPlan:
+    def test_update_json_actions_on_same_path_are_fused(self, tmp_path, rich_console):
+        target = tmp_path / "opencode.json"
+        calls = []
+
+        def add_a(cur: Dict[str, Any]) -> Dict[str, Any]:
+            calls.append("a")
+            return {**cur, "a": 1}
+
+        def add_b(cur: Dict[str, Any]) -> Dict[str, Any]:
+            calls.append("b")
+            return {**cur, "b": 2}
+
+        plan = MigrationPlan(root=tmp_path, dry_run=False, conflict="overwrite", console=rich_console)
+        plan.add_update_json(target, add_a, "first")
+        plan.add_update_json(target, add_b, "second")
+
+        assert plan.execute() == 0
+        assert calls == ["a", "b"]
+        assert json.loads(target.read_text()) == {"a": 1, "b": 2}
+        assert not plan.backup_dir().exists()
+
+    def test_update_json_keeps_integers_beyond_64_bits(self, tmp_path, rich_console):
+        target = tmp_path / "opencode.json"
+        target.write_text('{"big": 100000000000000000000, "neg": -9223372036854775809}\n')
+
+        plan = MigrationPlan(root=tmp_path, dry_run=False, conflict="overwrite", console=rich_console)
+        plan.add_update_json(target, lambda d: {**d, "a": 1}, "update")
+
+        assert plan.execute() == 0
+        assert json.loads(target.read_text()) == {
+            "big": 100000000000000000000,
+            "neg": -9223372036854775809,
+            "a": 1,
+        }
+        assert "100000000000000000000" in target.read_text()
+
+    def test_overwrite_keeps_backup_of_previous_content(self, tmp_path, rich_console):
+        target = tmp_path / "agent.md"
+        target.write_text("old\n")
+
+        plan = MigrationPlan(root=tmp_path, dry_run=False, conflict="overwrite", console=rich_console)
+        plan.add_write_text(target, "new\n", "rewrite")
+
+        assert plan.execute() == 0
+        assert target.read_text() == "new\n"
+        assert (plan.backup_dir() / "agent.md").read_text() == "old\n"
+
+    def test_failed_backup_leaves_target_and_no_temp_file(self, tmp_path, rich_console):
+        target = tmp_path / "opencode.json"
+        target.write_text("{}\n")
+        (tmp_path / ".opencode-migrate-backup").write_text("not a directory")
+
+        plan = MigrationPlan(root=tmp_path, dry_run=False, conflict="overwrite", console=rich_console)
+        plan.add_update_json(target, lambda d: {**d, "a": 1}, "update")
+
+        assert plan.execute() == 1
+        assert target.read_text() == "{}\n"
+        assert sorted(p.name for p in tmp_path.iterdir()) == [".opencode-migrate-backup", "opencode.json"]
+
+    def test_duplicate_mkdir_is_queued_once(self, tmp_path, rich_console):
+        plan = MigrationPlan(root=tmp_path, dry_run=False, conflict="skip", console=rich_console)
+        plan.add_mkdir(tmp_path / "out")
+        plan.add_mkdir(tmp_path / "out")
+        plan.add_write_text(tmp_path / "nested" / "file.md", "x\n", "write")
+
+        assert len(plan.mkdirs) == 1
+        assert plan.execute() == 0
+        assert (tmp_path / "out").is_dir()
+        assert (tmp_path / "nested" / "file.md").read_text() == "x\n"
+
+    def test_identical_file_is_up_to_date(self, tmp_path, rich_console):
+        target = tmp_path / "agent.md"
+        target.write_text("same\n")
+
+        plan = MigrationPlan(root=tmp_path, dry_run=False, conflict="overwrite", console=rich_console)
+        plan.add_write_text(target, "same\n", "rewrite")
+
+        assert plan.execute() == 0
+        assert not plan.backup_dir().exists()
+
+    def test_dry_run_summary_counts_lines_and_bytes(self, tmp_path, capsys):
+        wide_console = Console(force_terminal=False, no_color=True, width=400)
+        changed = tmp_path / "changed.md"
+        changed.write_text("a\nb\nc\n")
+
+        plan = MigrationPlan(root=tmp_path, dry_run=True, conflict="overwrite", console=wide_console)
+        plan.add_write_text(changed, "a\nB\nc\n", "edit one line")
+        plan.add_write_text(tmp_path / "new.md", "é\n", "create")
+        assert plan.execute() == 0
+
+        out = capsys.readouterr().out
+        assert "(+1 -1 lines)" in out
+        assert "(3 bytes)" in out
+
+    def test_dry_run_reads_same_size_target_once(self, tmp_path, rich_console, monkeypatch):
+        target = tmp_path / "agent.md"
+        target.write_text("old\n")
+        reads = []
+        read_bytes = Path.read_bytes
+
+        def counting_read_bytes(path: Path) -> bytes:
+            reads.append(path)
+            return read_bytes(path)
+
+        monkeypatch.setattr(Path, "read_bytes", counting_read_bytes)
+        plan = MigrationPlan(root=tmp_path, dry_run=True, conflict="overwrite", console=rich_console)
+        plan.add_write_text(target, "new\n", "rewrite")
+
+        assert plan.execute() == 0
+        assert reads == [target]
+
+    def test_dry_run_reports_missing_json_as_create(self, tmp_path, capsys):
+        wide_console = Console(force_terminal=False, no_color=True, width=400)
+        target = tmp_path / "opencode.json"
+
+        plan = MigrationPlan(root=tmp_path, dry_run=True, conflict="overwrite", console=wide_console)
+        plan.add_update_json(target, lambda d: {**d, "a": "é"}, "update")
+        assert plan.execute() == 0
+
+        out = capsys.readouterr().out
+        size = len('{\n  "a": "é"\n}\n'.encode("utf-8"))
+        assert f"would create {target} ({size} bytes)" in out
+        assert "would update" not in out
+        assert not target.exists()
+
+    def test_dry_run_agrees_with_real_run_on_line_endings(self, tmp_path, rich_console, capsys):
+        target = tmp_path / "agent.md"
+        target.write_bytes(b"x\r\ny\r\n")
+
+        outputs = []
+        for dry_run in (True, False):
+            plan = MigrationPlan(root=tmp_path, dry_run=dry_run, conflict="skip", console=rich_console)
+            plan.add_write_text(target, "x\ny\n", "rewrite")
+            assert plan.execute() == 0
+            outputs.append(capsys.readouterr().out)
+
+        dry_out, real_out = outputs
+        assert "would update" in dry_out and "up-to-date" not in dry_out
+        assert "skip (conflict)" in real_out and "up-to-date" not in real_out
+        assert target.read_bytes() == b"x\r\ny\r\n"
+
+
 # ---------------------------
 # Integration Tests
 # ---------------------------
 
 class TestIntegration:
-    def test_full_migration_dry_run(self, temp_project, console):
+    def test_full_migration_dry_run(self, temp_project, rich_console):
         """Test that dry-run doesn't create files."""
         result = run_migration(
             root=temp_project,
@@ -462,14 +728,14 @@ class TestIntegration:
             mcp_target="project",
             dry_run=True,
             conflict="skip",
-            console=console,
+            console=rich_console,
         )
 
         assert result == 0
         # Dry run should NOT create .opencode directory
         # (it only prints what would happen)
 
-    def test_agent_migration_creates_files(self, temp_project, console):
+    def test_agent_migration_creates_files(self, temp_project, rich_console):
         """Test that agent migration creates correct files."""
         result = run_migration(
             root=temp_project,
@@ -481,7 +747,7 @@ class TestIntegration:
             mcp_target="project",
             dry_run=False,
             conflict="overwrite",
-            console=console,
+            console=rich_console,
         )
 
         assert result == 0
@@ -495,7 +761,51 @@ class TestIntegration:
         content = agent_file.read_text()
         assert "mode: subagent" in content
 
-    def test_idempotency(self, temp_project, console):
+    def test_crlf_agent_file_is_migrated(self, temp_project, rich_console):
+        """Test that Windows line endings do not hide the frontmatter."""
+        src = temp_project / ".claude" / "agents" / "crlf-agent.md"
+        src.write_bytes(b"---\r\nname: crlf-agent\r\nmodel: sonnet\r\n---\r\n# CRLF Agent\r\n")
+
+        run_migration(
+            root=temp_project,
+            migrate_agents=True,
+            migrate_commands=False,
+            migrate_permissions=False,
+            migrate_mcp=False,
+            include_local_settings=False,
+            mcp_target="project",
+            dry_run=False,
+            conflict="overwrite",
+            console=rich_console,
+        )
+
+        content = (temp_project / ".opencode" / "agent" / "crlf-agent.md").read_bytes()
+        assert b"\r" not in content
+        assert b"mode: subagent" in content
+        assert b"model: anthropic/" in content
+
+    def test_unreadable_agents_dir_is_skipped(self, temp_project, rich_console, monkeypatch):
+        """Test that a directory that cannot be listed does not abort the migration."""
+        def deny(path: Any) -> Any:
+            raise PermissionError(13, "Permission denied", str(path))
+
+        monkeypatch.setattr(os, "scandir", deny)
+        result = run_migration(
+            root=temp_project,
+            migrate_agents=True,
+            migrate_commands=True,
+            migrate_permissions=False,
+            migrate_mcp=False,
+            include_local_settings=False,
+            mcp_target="project",
+            dry_run=True,
+            conflict="skip",
+            console=rich_console,
+        )
+
+        assert result == 0
+
+    def test_idempotency(self, temp_project, rich_console):
         """Test that running twice produces same result."""
         # First run
         run_migration(
@@ -508,11 +818,16 @@ class TestIntegration:
             mcp_target="project",
             dry_run=False,
             conflict="overwrite",
-            console=console,
+            console=rich_console,
         )
 
         # Capture state
-        agent_content = (temp_project / ".opencode" / "agent" / "test-agent.md").read_text()
+        outputs = [
+            temp_project / ".opencode" / "agent" / "test-agent.md",
+            temp_project / ".opencode" / "command" / "test-command.md",
+            temp_project / "opencode.json",
+        ]
+        digests = [hashlib.blake2b(p.read_bytes(), digest_size=16).digest() for p in outputs]
 
         # Second run
         run_migration(
@@ -525,12 +840,12 @@ class TestIntegration:
             mcp_target="project",
             dry_run=False,
             conflict="overwrite",
-            console=console,
+            console=rich_console,
         )
 
         # Content should be identical
-        agent_content_2 = (temp_project / ".opencode" / "agent" / "test-agent.md").read_text()
-        assert agent_content == agent_content_2
+        digests_2 = [hashlib.blake2b(p.read_bytes(), digest_size=16).digest() for p in outputs]
+        assert digests == digests_2
 
 
 if __name__ == "__main__":
@@ -14,6 +14,12 @@ Run this script with:
 
 import asyncio
 import os
+from pathlib import Path
+
+# Binary produced by `cargo build` in this directory
+PREBUILT_SERVER = Path(__file__).resolve().parent / "target" / "debug" / (
+    "example-05-mcp-basic.exe" if os.name == "nt" else "example-05-mcp-basic"
+)
 
 
 async def test_mcp_server():
@@ -25,10 +31,15 @@ async def test_mcp_server():
     print("🧪 MCP Server Test Client (Using Official SDK via uv)")
     print("=" * 60)
 
-    # Configure the server parameters - run from current directory
+    # Configure the server parameters. Prefer a pre-built binary: `cargo run`
+    # re-checks the build on every start. Otherwise run from current directory.
+    if PREBUILT_SERVER.exists():
+        command, args = str(PREBUILT_SERVER), []
+    else:
+        command, args = "cargo", ["run"]
     server_params = StdioServerParameters(
-        command="cargo",
-        args=["run"],
+        command=command,
+        args=args,
         env=os.environ.copy()
     )
 
@@ -54,58 +65,33 @@ async def test_mcp_server():
                 # Test 3: Call tools
                 print("\n3. Testing tool calls...")
 
-                # Test analyze_text
+                # Issue all calls at once; the session matches responses to
+                # requests by id, so they share the pipe instead of taking
+                # one round-trip each.
                 test_text = "Hello world!\nThis is a test.\nWith multiple lines."
-                try:
-                    result = await session.call_tool(
-                        "analyze_text",
-                        arguments={"text": test_text}
-                    )
-                    print("✅ analyze_text successful!")
-                    if hasattr(result, 'content') and result.content:
-                        content = result.content[0]
-                        if hasattr(content, 'text'):
-                            print(f"   Result: {content.text}")
-                        else:
-                            print(f"   Result: {content}")
-                except Exception as e:
-                    print(f"❌ analyze_text failed: {e}")
-
-                # Test to_uppercase
-                try:
-                    result = await session.call_tool(
-                        "to_uppercase",
-                        arguments={"text": "hello world"}
-                    )
-                    print("✅ to_uppercase successful!")
-                    if hasattr(result, 'content') and result.content:
-                        content = result.content[0]
-                        if hasattr(content, 'text'):
-                            print(f"   Result: {content.text}")
-                        else:
-                            print(f"   Result: {content}")
-                except Exception as e:
-                    print(f"❌ to_uppercase failed: {e}")
-
-                # Test summarize with optional parameter
                 long_text = " ".join([f"word{i}" for i in range(100)])
-                try:
-                    result = await session.call_tool(
-                        "summarize",
-                        arguments={
-                            "text": long_text,
-                            "max_words": 10
-                        }
-                    )
-                    print("✅ summarize successful!")
+                calls = [
+                    ("analyze_text", {"text": test_text}),
+                    ("to_uppercase", {"text": "hello world"}),
+                    # summarize with optional parameter
+                    ("summarize", {"text": long_text, "max_words": 10}),
+                ]
+                results = await asyncio.gather(
+                    *(session.call_tool(name, arguments=arguments) for name, arguments in calls),
+                    return_exceptions=True,
+                )
+
+                for (name, _), result in zip(calls, results):
+                    if isinstance(result, Exception):
+                        print(f"❌ {name} failed: {result}")
+                        continue
+                    print(f"✅ {name} successful!")
                     if hasattr(result, 'content') and result.content:
                         content = result.content[0]
                         if hasattr(content, 'text'):
                             print(f"   Result: {content.text}")
                         else:
                             print(f"   Result: {content}")
-                except Exception as e:
-                    print(f"❌ summarize failed: {e}")
 
                 print("\n✅ All tests completed!")
 
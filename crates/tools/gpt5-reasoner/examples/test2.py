@@ -1,12 +1,30 @@
+import math
+
 def is_prime(n):
     """Check if a number is prime."""
     if n < 2:
         return False
-    for i in range(2, int(n**0.5) + 1):
-        if n % i == 0:
+    if n < 4:
+        return True
+    if n % 2 == 0 or n % 3 == 0:
+        return False
+    # Remaining candidates are of the form 6k ± 1
+    i = 5
+    root = math.isqrt(n)
+    while i <= root:
+        if n % i == 0 or n % (i + 2) == 0:
             return False
+        i += 6
     return True
 
 def get_primes_up_to(limit):
     """Get all prime numbers up to a given limit."""
-    return [n for n in range(2, limit + 1) if is_prime(n)]
\ No newline at end of file
+    if limit < 2:
+        return []
+    # Sieve of Eratosthenes
+    sieve = bytearray([1]) * (limit + 1)
+    sieve[0] = sieve[1] = 0
+    for i in range(2, math.isqrt(limit) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit + 1, i)))
+    return [n for n, flag in enumerate(sieve) if flag]
\ No newline at end of file